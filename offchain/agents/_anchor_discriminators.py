@@ -0,0 +1,40 @@
+"""
+Precomputed Anchor instruction discriminators (sha256("global:<name>")[:8]).
+
+Generated file. After adding an instruction to INSTRUCTIONS, regenerate with:
+
+    python _anchor_discriminators.py
+"""
+import hashlib
+
+
+# Instructions the off-chain scripts call in the zypher program
+INSTRUCTIONS = ["initialize_config", "trigger_hedge"]
+
+DISCRIMINATORS = {
+    "global:initialize_config": b"\xd0\x7f\x15\x01\xc2\xbe\xc4\x46",
+    "global:trigger_hedge": b"\x1d\xe7\xf9\x68\xbf\x2d\x33\xc6",
+}
+
+
+def _render():
+    """Render this module's source with freshly computed discriminators."""
+    with open(__file__, 'r') as f:
+        source = f.read()
+    head, rest = source.split("DISCRIMINATORS = {\n", 1)
+    tail = rest.split("}\n", 1)[1]
+
+    entries = []
+    for name in INSTRUCTIONS:
+        preimage = f"global:{name}"
+        digest = hashlib.sha256(preimage.encode()).digest()[:8]
+        literal = "".join(f"\\x{byte:02x}" for byte in digest)
+        entries.append(f'    "{preimage}": b"{literal}",\n')
+    return head + "DISCRIMINATORS = {\n" + "".join(entries) + "}\n" + tail
+
+
+if __name__ == '__main__':
+    rendered = _render()
+    with open(__file__, 'w') as f:
+        f.write(rendered)
+    print(f"Wrote {len(INSTRUCTIONS)} discriminators to {__file__}")
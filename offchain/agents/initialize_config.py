@@ -2,36 +2,70 @@
 Script to initialize the global config account for the Zypher Protocol.
 This needs to be run once before the agent can start hedging.
 """
-import json
+import orjson
 import hashlib
 import struct
+import functools
 from solana.rpc.api import Client
+from solana.rpc.commitment import Processed
 from solders.keypair import Keypair
-from solders.transaction import Transaction
-from solders.message import Message
+from solders.transaction import VersionedTransaction
+from solders.message import MessageV0
 from solders.instruction import Instruction, AccountMeta
 from solders.pubkey import Pubkey
 from solders.system_program import ID as SYS_PROGRAM_ID
+from _anchor_discriminators import DISCRIMINATORS
 import os
 
 
+# Well-known accounts, parsed once at import
+WSOL_MINT = Pubkey.from_string("So11111111111111111111111111111111111111112")  # Wrapped SOL mint
+PYTH_SOL_USD_DEV = Pubkey.from_string("J83w4HKfqxwcq3BEMMkPFSppX3gqekLyLJBexebFVkix")  # Pyth SOL/USD devnet
+
+# Approved collaterals (example: SOL) and oracle accounts (Pyth SOL/USD feed on devnet)
+APPROVED_COLLATERALS = [WSOL_MINT]
+ORACLE_ACCOUNTS = [PYTH_SOL_USD_DEV]
+
+# Serialized once so building the instruction doesn't cross into solders per key
+APPROVED_COLLATERAL_BYTES = [bytes(pubkey) for pubkey in APPROVED_COLLATERALS]
+ORACLE_ACCOUNT_BYTES = [bytes(pubkey) for pubkey in ORACLE_ACCOUNTS]
+
+
 def compute_anchor_discriminator(namespace, name):
-    """Compute Anchor instruction discriminator using SHA256."""
+    """Return the Anchor instruction discriminator (precomputed, SHA256 fallback)."""
     preimage = f"{namespace}:{name}"
-    hash_result = hashlib.sha256(preimage.encode()).digest()
-    return hash_result[:8]
+    discriminator = DISCRIMINATORS.get(preimage)
+    if discriminator is None:
+        discriminator = hashlib.sha256(preimage.encode()).digest()[:8]
+    return discriminator
+
+
+@functools.lru_cache(maxsize=256)
+def _pda(program_id_str, seed):
+    """Derive the (PDA, bump) for a single-seed account; cached per program and seed."""
+    return Pubkey.find_program_address([seed], Pubkey.from_string(program_id_str))
+
+
+@functools.lru_cache(maxsize=8)
+def _init_config_struct(n_collaterals, n_oracles):
+    """Compiled initialize_config instruction layout for the given Vec<Pubkey> lengths."""
+    return struct.Struct(f"<8sQI{32 * n_collaterals}sI{32 * n_oracles}s")
+
+
+# Layout for the configured lists (one collateral, one oracle: "<8sQI32sI32s")
+_INIT_CFG_STRUCT = _init_config_struct(len(APPROVED_COLLATERAL_BYTES), len(ORACLE_ACCOUNT_BYTES))
 
 
 def initialize_config():
     """Initialize the global config account."""
     # Load configuration
-    with open('config.json', 'r') as f:
-        config = json.load(f)
+    with open('config.json', 'rb') as f:
+        config = orjson.loads(f.read())
     
     # Load keypair
     keypair_path = config['wallet_keypair_path'].replace('~', os.path.expanduser('~'))
-    with open(keypair_path, 'r') as f:
-        keypair_data = json.load(f)
+    with open(keypair_path, 'rb') as f:
+        keypair_data = orjson.loads(f.read())
         keypair = Keypair.from_bytes(bytes(keypair_data))
     
     client = Client(config['rpc_url'])
@@ -42,35 +76,21 @@ def initialize_config():
     print(f"Admin: {admin_pubkey}")
     
     # Derive config PDA
-    config_seeds = [b"config"]
-    config_pda, config_bump = Pubkey.find_program_address(config_seeds, program_id)
+    config_pda, config_bump = _pda(config['program_id'], b"config")
     print(f"Config PDA: {config_pda}")
     
-    # Check if config already exists
-    try:
-        account_info = client.get_account_info(config_pda)
-        if account_info.value is not None:
-            print("Config account already initialized!")
-            return
-    except:
-        pass
+    # Check if config already exists (processed is enough for this probe; RPC errors propagate)
+    account_info = client.get_account_info(config_pda, commitment=Processed)
+    if account_info.value is not None:
+        print("Config account already initialized!")
+        return
     
     # For this example, we'll use a dummy AEGIS mint and dummy collaterals
     # In production, you'd use real SPL token mints
     
     # Create a dummy mint pubkey (you should replace this with your actual AEGIS mint)
     # For now, we'll use the system program ID as a placeholder
-    zypher_mint = Pubkey.from_string("So11111111111111111111111111111111111111112")  # Wrapped SOL mint
-    
-    # Approved collaterals (example: SOL)
-    approved_collaterals = [
-        Pubkey.from_string("So11111111111111111111111111111111111111112")  # Wrapped SOL
-    ]
-    
-    # Oracle accounts (Pyth SOL/USD feed on devnet)
-    oracle_accounts = [
-        Pubkey.from_string("J83w4HKfqxwcq3BEMMkPFSppX3gqekLyLJBexebFVkix")  # Pyth SOL/USD devnet
-    ]
+    zypher_mint = WSOL_MINT
     
     # Min collateral ratio: 150% = 150_000_000 (with 8 decimals)
     min_ratio = 150_000_000
@@ -80,19 +100,17 @@ def initialize_config():
     
     # Serialize instruction data
     # Format: discriminator (8) + min_ratio (u64 LE) + approved_collaterals (Vec<Pubkey>) + oracle_accounts (Vec<Pubkey>)
-    data = bytearray()
-    data.extend(discriminator)
-    data.extend(struct.pack('<Q', min_ratio))
-    
-    # Serialize Vec<Pubkey> for approved_collaterals
-    data.extend(struct.pack('<I', len(approved_collaterals)))  # length prefix
-    for pubkey in approved_collaterals:
-        data.extend(bytes(pubkey))
-    
-    # Serialize Vec<Pubkey> for oracle_accounts
-    data.extend(struct.pack('<I', len(oracle_accounts)))  # length prefix
-    for pubkey in oracle_accounts:
-        data.extend(bytes(pubkey))
+    # Each Vec<Pubkey> is a u32 LE length prefix followed by the 32-byte keys
+    approved_bytes = b"".join(APPROVED_COLLATERAL_BYTES)
+    oracle_bytes = b"".join(ORACLE_ACCOUNT_BYTES)
+    data = _INIT_CFG_STRUCT.pack(
+        discriminator,
+        min_ratio,
+        len(APPROVED_COLLATERAL_BYTES),
+        approved_bytes,
+        len(ORACLE_ACCOUNT_BYTES),
+        oracle_bytes,
+    )
     
     # Create instruction accounts
     # pub struct InitializeConfig<'info> {
@@ -110,7 +128,7 @@ def initialize_config():
     
     instruction = Instruction(
         program_id=program_id,
-        data=bytes(data),
+        data=data,
         accounts=accounts
     )
     
@@ -118,13 +136,15 @@ def initialize_config():
     blockhash_resp = client.get_latest_blockhash()
     recent_blockhash = blockhash_resp.value.blockhash
     
-    # Create and sign transaction
-    message = Message.new_with_blockhash(
-        [instruction],
+    # Create and sign a v0 transaction; solana-py sends versioned transactions
+    # as-is instead of re-fetching a blockhash and re-signing
+    message = MessageV0.try_compile(
         admin_pubkey,
+        [instruction],
+        [],
         recent_blockhash
     )
-    transaction = Transaction([keypair], message, recent_blockhash)
+    transaction = VersionedTransaction(message, [keypair])
     
     # Send transaction
     print("Sending initialize_config transaction...")
@@ -0,0 +1,321 @@
+/*
+ * Native Poseidon permutation for the StarkNet prime field.
+ *
+ * Mirrors PoseidonHash in agent.py (t=3, 8 full + 83 partial rounds, same
+ * deterministic round constants and MDS matrix) but keeps the state as
+ * 4x64-bit limbs in Montgomery form (R = 2^256) instead of Python ints.
+ * Multiplication is CIOS Montgomery; since p = 2^251 + 17*2^192 + 1 is
+ * 1 mod 2^64, the reduction factor per limb is just -t[0] and the two middle
+ * limbs of p are zero, so the compiler folds most of the reduction away.
+ *
+ * Build next to agent.py with:  python setup.py build_ext --inplace
+ */
+#define PY_SSIZE_T_CLEAN
+#include <Python.h>
+#include <stdint.h>
+#include <string.h>
+
+typedef unsigned __int128 u128;
+
+#define T 3
+#define N_ROUNDS_F 8
+#define N_ROUNDS_P 83
+#define N_ROUNDS (N_ROUNDS_F + N_ROUNDS_P)
+#define FIELD_BYTES 32
+#define STATE_BYTES (T * FIELD_BYTES)
+
+/* StarkNet prime, little-endian limbs */
+static const uint64_t P[4] = {
+    0x0000000000000001ULL, 0x0000000000000000ULL,
+    0x0000000000000000ULL, 0x0800000000000011ULL,
+};
+
+/* R^2 mod p, used to move values into Montgomery form */
+static const uint64_t R2[4] = {
+    0xfffffd737e000401ULL, 0x00000001330fffffULL,
+    0xffffffffff6f8000ULL, 0x07ffd4ab5e008810ULL,
+};
+
+static const uint64_t ONE[4] = {1, 0, 0, 0};
+
+/* Round constants in Montgomery form, filled at module init */
+static uint64_t RC[N_ROUNDS * T][4];
+
+static int
+geq_p(const uint64_t a[4])
+{
+    for (int i = 3; i >= 0; i--) {
+        if (a[i] != P[i])
+            return a[i] > P[i];
+    }
+    return 1;
+}
+
+static void
+sub_p(uint64_t a[4])
+{
+    uint64_t borrow = 0;
+    for (int i = 0; i < 4; i++) {
+        u128 d = (u128)a[i] - P[i] - borrow;
+        a[i] = (uint64_t)d;
+        borrow = (uint64_t)(d >> 64) & 1;
+    }
+}
+
+/* r = a + b mod p; inputs < p < 2^252 so the raw sum cannot overflow */
+static void
+add_mod(uint64_t r[4], const uint64_t a[4], const uint64_t b[4])
+{
+    uint64_t carry = 0;
+    for (int i = 0; i < 4; i++) {
+        u128 s = (u128)a[i] + b[i] + carry;
+        r[i] = (uint64_t)s;
+        carry = (uint64_t)(s >> 64);
+    }
+    if (geq_p(r))
+        sub_p(r);
+}
+
+/* r = a * b * R^-1 mod p (CIOS); r may alias a or b */
+static void
+mont_mul(uint64_t r[4], const uint64_t a[4], const uint64_t b[4])
+{
+    uint64_t t[6] = {0};
+
+    for (int i = 0; i < 4; i++) {
+        u128 acc;
+        uint64_t carry = 0;
+
+        for (int j = 0; j < 4; j++) {
+            acc = (u128)a[j] * b[i] + t[j] + carry;
+            t[j] = (uint64_t)acc;
+            carry = (uint64_t)(acc >> 64);
+        }
+        acc = (u128)t[4] + carry;
+        t[4] = (uint64_t)acc;
+        t[5] = (uint64_t)(acc >> 64);
+
+        /* m = t[0] * (-p^-1 mod 2^64) = -t[0] because p = 1 mod 2^64 */
+        uint64_t m = (uint64_t)0 - t[0];
+        acc = (u128)m * P[0] + t[0];
+        carry = (uint64_t)(acc >> 64);
+        for (int j = 1; j < 4; j++) {
+            acc = (u128)m * P[j] + t[j] + carry;
+            t[j - 1] = (uint64_t)acc;
+            carry = (uint64_t)(acc >> 64);
+        }
+        acc = (u128)t[4] + carry;
+        t[3] = (uint64_t)acc;
+        t[4] = t[5] + (uint64_t)(acc >> 64);
+    }
+
+    memcpy(r, t, 4 * sizeof(uint64_t));
+    if (t[4] || geq_p(r))
+        sub_p(r);
+}
+
+static void
+sbox(uint64_t x[4])
+{
+    uint64_t x2[4], x4[4];
+
+    mont_mul(x2, x, x);
+    mont_mul(x4, x2, x2);
+    mont_mul(x, x4, x);
+}
+
+/*
+ * MDS matrix [[3,1,1],[1,3,1],[1,1,3]] = J + 2I, so row i is
+ * (s0 + s1 + s2) + 2*s[i]: one shared sum, then two additions per lane.
+ */
+static void
+mix(uint64_t s[T][4])
+{
+    uint64_t sum[4], twice[4];
+
+    add_mod(sum, s[0], s[1]);
+    add_mod(sum, sum, s[2]);
+    for (int i = 0; i < T; i++) {
+        add_mod(twice, s[i], s[i]);
+        add_mod(s[i], sum, twice);
+    }
+}
+
+static void
+permute(uint64_t s[T][4])
+{
+    const int half = N_ROUNDS_F / 2;
+
+    for (int r = 0; r < N_ROUNDS; r++) {
+        for (int i = 0; i < T; i++)
+            add_mod(s[i], s[i], RC[r * T + i]);
+
+        if (r < half || r >= half + N_ROUNDS_P) {
+            for (int i = 0; i < T; i++)
+                sbox(s[i]);
+        }
+        else {
+            sbox(s[0]);
+        }
+
+        mix(s);
+    }
+}
+
+static void
+load_be(uint64_t r[4], const unsigned char *buf)
+{
+    for (int i = 0; i < 4; i++) {
+        uint64_t limb = 0;
+        for (int k = 0; k < 8; k++)
+            limb = (limb << 8) | buf[(3 - i) * 8 + k];
+        r[i] = limb;
+    }
+}
+
+static void
+store_be(unsigned char *buf, const uint64_t a[4])
+{
+    for (int i = 0; i < 4; i++) {
+        uint64_t limb = a[i];
+        for (int k = 7; k >= 0; k--) {
+            buf[(3 - i) * 8 + k] = (unsigned char)limb;
+            limb >>= 8;
+        }
+    }
+}
+
+static void
+init_round_constants(void)
+{
+    /* Same LCG as _generate_round_constants in agent.py, run in Montgomery form */
+    const uint64_t seed0[4] = {0x506f736569646f6eULL, 0, 0, 0};
+    const uint64_t mul[4] = {0x1234567890abcdefULL, 0, 0, 0};
+    const uint64_t inc[4] = {0xfedcba0987654321ULL, 0, 0, 0};
+    uint64_t seed[4], mul_m[4], inc_m[4];
+
+    mont_mul(seed, seed0, R2);
+    mont_mul(mul_m, mul, R2);
+    mont_mul(inc_m, inc, R2);
+
+    for (int i = 0; i < N_ROUNDS * T; i++) {
+        mont_mul(seed, seed, mul_m);
+        add_mod(seed, seed, inc_m);
+        memcpy(RC[i], seed, sizeof(seed));
+    }
+}
+
+/*
+ * Permute one serialized state in place (three 32-byte big-endian elements).
+ * Returns the index of the first unreduced element, or -1 on success.
+ */
+static int
+permute_state_bytes(unsigned char *buf)
+{
+    uint64_t s[T][4];
+
+    for (int i = 0; i < T; i++) {
+        load_be(s[i], buf + i * FIELD_BYTES);
+        if (geq_p(s[i]))
+            return i;
+        mont_mul(s[i], s[i], R2);
+    }
+
+    permute(s);
+
+    for (int i = 0; i < T; i++) {
+        mont_mul(s[i], s[i], ONE);
+        store_be(buf + i * FIELD_BYTES, s[i]);
+    }
+    return -1;
+}
+
+/* Copy a bytes-like argument into a new bytes object and permute each state */
+static PyObject *
+permute_states(PyObject *arg, int single)
+{
+    Py_buffer view;
+    PyObject *result;
+
+    if (PyObject_GetBuffer(arg, &view, PyBUF_SIMPLE) < 0)
+        return NULL;
+    if (single ? view.len != STATE_BYTES : view.len % STATE_BYTES != 0) {
+        PyErr_Format(PyExc_ValueError,
+                     single ? "state must be %d bytes, got %zd"
+                            : "batch must be a multiple of %d bytes, got %zd",
+                     STATE_BYTES, view.len);
+        PyBuffer_Release(&view);
+        return NULL;
+    }
+    result = PyBytes_FromStringAndSize((const char *)view.buf, view.len);
+    PyBuffer_Release(&view);
+    if (result == NULL)
+        return NULL;
+
+    unsigned char *buf = (unsigned char *)PyBytes_AS_STRING(result);
+    Py_ssize_t n_states = PyBytes_GET_SIZE(result) / STATE_BYTES;
+    Py_ssize_t k;
+    int bad = -1;
+
+    /* `result` is not shared yet, so other threads can run while we permute */
+    Py_BEGIN_ALLOW_THREADS
+    for (k = 0; k < n_states; k++) {
+        bad = permute_state_bytes(buf + k * STATE_BYTES);
+        if (bad >= 0)
+            break;
+    }
+    Py_END_ALLOW_THREADS
+
+    if (bad >= 0) {
+        PyErr_Format(PyExc_ValueError,
+                     "state element %zd is not reduced modulo p",
+                     k * T + bad);
+        Py_DECREF(result);
+        return NULL;
+    }
+    return result;
+}
+
+PyDoc_STRVAR(permute_doc,
+"permute(state_bytes) -> bytes\n\n"
+"Apply the Poseidon permutation to a t=3 state given as three 32-byte\n"
+"big-endian field elements (each reduced modulo p). Returns the new state\n"
+"in the same encoding.");
+
+static PyObject *
+poseidon_permute(PyObject *module, PyObject *arg)
+{
+    return permute_states(arg, 1);
+}
+
+PyDoc_STRVAR(permute_batch_doc,
+"permute_batch(states_bytes) -> bytes\n\n"
+"Apply the Poseidon permutation to each of a concatenation of serialized\n"
+"states (96 bytes each, as for permute()) in a single call.");
+
+static PyObject *
+poseidon_permute_batch(PyObject *module, PyObject *arg)
+{
+    return permute_states(arg, 0);
+}
+
+static PyMethodDef poseidon_methods[] = {
+    {"permute", poseidon_permute, METH_O, permute_doc},
+    {"permute_batch", poseidon_permute_batch, METH_O, permute_batch_doc},
+    {NULL, NULL, 0, NULL},
+};
+
+static struct PyModuleDef poseidon_module = {
+    PyModuleDef_HEAD_INIT,
+    "poseidon_stark",
+    "Native Poseidon permutation over the StarkNet prime field.",
+    -1,
+    poseidon_methods,
+};
+
+PyMODINIT_FUNC
+PyInit_poseidon_stark(void)
+{
+    init_round_constants();
+    return PyModule_Create(&poseidon_module);
+}
@@ -0,0 +1,20 @@
+"""
+Build script for the optional native Poseidon permutation used by agent.py.
+
+    python setup.py build_ext --inplace
+
+agent.py falls back to the pure-Python PoseidonHash when the extension is not built.
+"""
+from setuptools import setup, Extension
+
+
+setup(
+    name='zypher-agents-native',
+    ext_modules=[
+        Extension(
+            'poseidon_stark',
+            sources=['poseidon_stark.c'],
+            extra_compile_args=['-O3'],
+        )
+    ],
+)